@@ -1,5 +1,7 @@
 import os
-import time
+import queue
+import threading
+from collections import deque
 from dotenv import load_dotenv
 from src.stt import STT
 from src.llm_processor import LLMProcessor
@@ -12,16 +14,25 @@ class InterviewCheatSheet:
         self.gui = gui
         self.llm_processor = LLMProcessor()
         self.stt = None
-        self.processed_questions = []  # Track processed questions to avoid duplicates
+        self.processed_questions = deque(maxlen=10)  # (question, word set) of recent questions to avoid duplicates
         self.user_profile = None
         self.interview_context = None
         
-    def is_similar_question(self, question: str) -> bool:
-        """Check if this question is similar to recently processed ones"""
-        question_words = set(question.lower().split())
+        # LLM calls run on daemon worker threads so the STT loop keeps draining transcriptions
+        # and closing the window doesn't wait for pending answers
+        self._question_queue = queue.Queue()  # (question id, question); None stops a worker
+        self._shutting_down = threading.Event()  # Set once the app stops; workers leave the GUI alone
+        self._answer_workers = [threading.Thread(target=self._answer_worker, daemon=True) for _ in range(2)]
+        for worker in self._answer_workers:
+            worker.start()
+        self._answer_lock = threading.Lock()
+        self._next_question_id = 0  # Id given to the next submitted question
+        self._answer_turn = 0  # Id of the question whose answer is shown next
+        self._pending_answers = {}  # question id -> {'question', 'chunks', 'answer'}
         
-        for prev_q in self.processed_questions[-3:]:  # Check last 3 questions
-            prev_words = set(prev_q.lower().split())
+    def is_similar_question(self, question_words: frozenset) -> bool:
+        """Check if a question's lowercased word set is similar to recently processed ones"""
+        for _, prev_words in list(self.processed_questions)[-3:]:  # Check last 3 questions
             # Calculate similarity (Jaccard index)
             if len(question_words) > 0 and len(prev_words) > 0:
                 similarity = len(question_words & prev_words) / len(question_words | prev_words)
@@ -45,14 +56,29 @@ class InterviewCheatSheet:
         
         # Get device config from env or use defaults
         device = os.getenv("STT_DEVICE", "cuda")  
-        model_size = os.getenv("STT_MODEL", "base.en")  # tiny.en, base.en, small.en, medium.en
+        # tiny.en, base.en, small.en, medium.en, distil-small.en, distil-medium.en
+        model_size = os.getenv("STT_MODEL")
+        # A model pre-converted with ct2-transformers-converter (see README) is loaded straight from disk.
+        # STT_MODEL_PATH always wins; the default directory is only used when STT_MODEL isn't set
+        model_path = os.getenv("STT_MODEL_PATH")
+        if not model_path and not model_size:
+            model_path = os.path.join("models", "whisper-base-int8")
+        if model_path and os.path.isdir(model_path):
+            model_size = model_path
+        elif not model_size:
+            model_size = "distil-small.en" if device == "cpu" else "base.en"
+        # auto, int8, int8_float16, float16, bfloat16, float32 ("auto" picks the fastest type the device supports)
+        compute_type = os.getenv("STT_COMPUTE_TYPE", "auto")
         
         try:
             # Initialize STT with faster-whisper
             self.stt = STT(
                 model_size=model_size,
                 device=device,
-                compute_type="int8" if device == "cpu" else "float16",
+                compute_type=compute_type,
+                cpu_threads=max(1, (os.cpu_count() or 2) // 2),  # Leave the other half for the LLM
+                num_workers=1,
+                download_root=os.getenv("STT_DOWNLOAD_ROOT", "models"),
                 language="en",
                 logging_level="WARNING"
             )
@@ -64,7 +90,10 @@ class InterviewCheatSheet:
             
             # Main loop - check for new transcriptions
             while self.stt.is_listening and self.gui.root.winfo_exists():
-                transcription = self.stt.get_last_transcription()
+                try:
+                    transcription = self.stt.get_transcription(timeout=0.5)
+                except queue.Empty:
+                    continue
                 
                 if transcription:
                     # Add to context history
@@ -82,32 +111,99 @@ class InterviewCheatSheet:
                             question_to_process = accumulated
                     
                     # Process question if found and not a duplicate
-                    if question_to_process and not self.is_similar_question(question_to_process):
+                    question_words = frozenset(question_to_process.lower().split()) if question_to_process else None
+                    if question_to_process and not self.is_similar_question(question_words):
                         # Check minimum quality - must be at least 5 words
                         if len(question_to_process.split()) >= 5:
-                            self.gui.add_question(question_to_process)
-                            self.gui.update_status("Generating answer...")
-                            
-                            # Process with LLM
-                            response = self.llm_processor.process(question_to_process)
-                            self.gui.add_answer(response)
-                            self.gui.update_status("Listening...")
+                            # Process with LLM in the background
+                            self.submit_question(question_to_process)
                             
                             # Track this question
-                            self.processed_questions.append(question_to_process)
-                            if len(self.processed_questions) > 10:  # Keep last 10
-                                self.processed_questions.pop(0)
+                            self.processed_questions.append(
+                                (question_to_process, question_words)
+                            )
                     else:
                         # Just show transcription without processing
                         self.gui.add_transcription(transcription)
                 
-                time.sleep(0.5)
-                
         except Exception as e:
             if self.gui:
                 self.gui.update_status(f"Error: {str(e)}")
             if self.stt:
                 self.stt.stop()
+        finally:
+            self.stop_answering()
+    
+    def stop_answering(self):
+        """Drop queued questions and stop the answer workers from updating the GUI"""
+        self._shutting_down.set()
+        for _ in self._answer_workers:
+            self._question_queue.put(None)
+    
+    def submit_question(self, question: str):
+        """Queue a question for answering; answers are displayed in question order"""
+        question_id = self._next_question_id
+        self._next_question_id += 1
+        
+        with self._answer_lock:
+            self._pending_answers[question_id] = {'question': question, 'chunks': [], 'answer': None}
+            if question_id == self._answer_turn:
+                self.gui.add_question(question)
+                self.gui.update_status("Generating answer...")
+        
+        self._question_queue.put((question_id, question))
+    
+    def _answer_worker(self):
+        """Answer queued questions until stop_answering is called"""
+        while True:
+            item = self._question_queue.get()
+            if item is None or self._shutting_down.is_set():
+                break
+            self._answer_question(*item)
+    
+    def _answer_question(self, question_id: int, question: str):
+        """Run the LLM for one question on a worker thread"""
+        def on_chunk(chunk):
+            with self._answer_lock:
+                if self._shutting_down.is_set():
+                    return
+                if question_id == self._answer_turn:
+                    self.gui.add_answer_chunk(chunk)
+                else:
+                    # An earlier answer is still on screen; hold this one back
+                    self._pending_answers[question_id]['chunks'].append(chunk)
+        
+        try:
+            response = self.llm_processor.process(question, on_chunk=on_chunk)
+        except Exception as e:
+            response = f"Error: {str(e)}"
+        
+        with self._answer_lock:
+            if self._shutting_down.is_set():
+                return
+            self._pending_answers[question_id]['answer'] = response
+            self._show_finished_answers()
+    
+    def _show_finished_answers(self):
+        """Display completed answers in order (caller holds _answer_lock)"""
+        while not self._shutting_down.is_set():
+            pending = self._pending_answers.get(self._answer_turn)
+            if pending is None or pending['answer'] is None:
+                return
+            
+            self.gui.add_answer(pending['answer'])
+            del self._pending_answers[self._answer_turn]
+            self._answer_turn += 1
+            
+            # Bring up the next question and whatever it has streamed so far
+            following = self._pending_answers.get(self._answer_turn)
+            if following is None:
+                self.gui.update_status("Listening...")
+                return
+            self.gui.add_question(following['question'])
+            for chunk in following['chunks']:
+                self.gui.add_answer_chunk(chunk)
+            following['chunks'] = []
 
 def main():
     """Main entry point for the application"""
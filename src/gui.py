@@ -7,6 +7,11 @@ from tkinter import ttk, scrolledtext
 from datetime import datetime
 from pathlib import Path
 import threading
+import queue
+
+CHAT_POLL_MS = 50  # How often queued chat updates are applied
+CHAT_BATCH_SIZE = 100  # Max queued updates applied per poll
+PROFILE_MAX_CHARS = 600  # The prompt only uses the first 500 characters of each profile file
 
 
 class InterviewGUI:
@@ -21,6 +26,9 @@ class InterviewGUI:
         self.user_profile = {}
         self.setup_complete = False
         self.running = False
+        self.answer_streaming = False
+        self._msg_queue = queue.Queue()  # Chat updates from worker threads, applied by _pump
+        self._msg_counter = 0  # Numbers the per-message formatting tags
         
         self.create_setup_screen()
         
@@ -74,7 +82,7 @@ class InterviewGUI:
         intro_path = database_path / "self_intro.txt"
         if intro_path.exists():
             with open(intro_path, 'r', encoding='utf-8') as f:
-                profile['self_intro'] = f.read()
+                profile['self_intro'] = f.read(PROFILE_MAX_CHARS)
         
         # Load company background
         company = self.company_entry.get().strip().lower().replace(" ", "_")
@@ -82,7 +90,7 @@ class InterviewGUI:
             company_path = database_path / f"company_{company}.txt"
             if company_path.exists():
                 with open(company_path, 'r', encoding='utf-8') as f:
-                    profile['company_background'] = f.read()
+                    profile['company_background'] = f.read(PROFILE_MAX_CHARS)
         
         return profile
         
@@ -135,6 +143,8 @@ class InterviewGUI:
                                                        font=("Arial", 10), bg='white',
                                                        state=tk.DISABLED)
         self.chat_display.pack(fill=tk.BOTH, expand=True)
+        self.chat_display.tag_config("answer_stream", foreground="#4CAF50", font=("Arial", 10, "bold"))
+        self.root.after(CHAT_POLL_MS, self._pump)
         
         # Status bar
         self.status_bar = tk.Label(self.root, text="Listening...", 
@@ -143,37 +153,102 @@ class InterviewGUI:
         
     def add_transcription(self, text):
         """Add transcription to chat"""
-        self.root.after(0, self._add_message, f"[Transcribed]: {text}", "#666666")
+        self._msg_queue.put(("message", f"[Transcribed]: {text}", "#666666", False))
         
     def add_question(self, question):
         """Add detected question to chat"""
-        self.root.after(0, self._add_message, f"\nQUESTION:\n{question}\n", "#FF5722", True)
-        
-    def add_answer(self, answer):
-        """Add AI answer to chat"""
-        self.root.after(0, self._add_message, f"ANSWER:\n{answer}\n{'='*60}\n", "#4CAF50", True)
+        self._msg_queue.put(("message", f"\nQUESTION:\n{question}\n", "#FF5722", True))
         
-    def _add_message(self, text, color, bold=False):
-        """Internal method to add message to chat display"""
-        self.chat_display.config(state=tk.NORMAL)
+    def add_answer_chunk(self, chunk):
+        """Append a piece of a streaming answer to chat"""
+        self._msg_queue.put(("chunk", chunk))
         
+    def add_answer(self, answer):
+        """Add AI answer to chat, replacing its streamed preview if any"""
+        self._msg_queue.put(("answer", f"ANSWER:\n{answer}\n{'='*60}\n"))
+        
+    def _pump(self):
+        """Apply queued chat updates in one batch, then poll again"""
+        if not self._msg_queue.empty():
+            self.chat_display.config(state=tk.NORMAL)
+            
+            # Consecutive messages with the same style are inserted together
+            run_style, run_texts = None, []
+            for _ in range(CHAT_BATCH_SIZE):
+                try:
+                    item = self._msg_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                if item[0] == "message":
+                    style = item[2:]
+                    if style != run_style and run_texts:
+                        self._insert_message("\n".join(run_texts), *run_style)
+                        run_texts = []
+                    run_style = style
+                    run_texts.append(item[1])
+                    continue
+                
+                if run_texts:
+                    self._insert_message("\n".join(run_texts), *run_style)
+                    run_style, run_texts = None, []
+                
+                if item[0] == "chunk":
+                    self._insert_answer_chunk(item[1])
+                else:
+                    self._insert_final_answer(item[1])
+            
+            if run_texts:
+                self._insert_message("\n".join(run_texts), *run_style)
+            
+            self.chat_display.config(state=tk.DISABLED)
+            self.chat_display.see(tk.END)
+        
+        self.root.after(CHAT_POLL_MS, self._pump)
+        
+    def _insert_answer_chunk(self, chunk):
+        """Internal method to append streamed answer text"""
+        if not self.answer_streaming:
+            # Bracket the preview with marks so add_answer replaces only it; transcriptions
+            # that arrive mid-stream go after the preview's closing newline
+            self.chat_display.mark_set("answer_start", "end-1c")
+            self.chat_display.mark_gravity("answer_start", tk.LEFT)
+            self.chat_display.insert(tk.END, "ANSWER:\n", "answer_stream")
+            self.chat_display.insert(tk.END, "\n")
+            self.chat_display.mark_set("answer_end", "end-2c")
+            self.chat_display.mark_gravity("answer_end", tk.RIGHT)
+            self.answer_streaming = True
+        
+        self.chat_display.insert("answer_end", chunk, "answer_stream")
+        
+    def _insert_final_answer(self, text):
+        """Internal method to replace the streamed preview with the final answer"""
+        if self.answer_streaming:
+            # Replace the preview in place, keeping anything shown after it
+            self.chat_display.delete("answer_start", "answer_end + 1c")
+            self.answer_streaming = False
+            self._insert_message(text, "#4CAF50", True, index="answer_start")
+        else:
+            self._insert_message(text, "#4CAF50", True)
+        
+    def _insert_message(self, text, color, bold=False, index=tk.END):
+        """Internal method to add message to chat display (must be editable)"""
         # Create tag for this message
-        tag_name = f"tag_{len(self.chat_display.get('1.0', tk.END))}"
+        self._msg_counter += 1
+        tag_name = f"tag_{self._msg_counter}"
         
-        self.chat_display.insert(tk.END, text + "\n")
+        start_index = self.chat_display.index("end-1c" if index == tk.END else index)
+        self.chat_display.mark_set("message_end", start_index)  # Right gravity: ends up after the insert
+        self.chat_display.insert(start_index, text + "\n")
         
         # Apply formatting
-        start_index = self.chat_display.index(f"end-{len(text)+2}c")
-        end_index = self.chat_display.index("end-2c")
+        end_index = self.chat_display.index("message_end - 1c")
         
         self.chat_display.tag_add(tag_name, start_index, end_index)
         self.chat_display.tag_config(tag_name, foreground=color)
         if bold:
             self.chat_display.tag_config(tag_name, font=("Arial", 10, "bold"))
         
-        self.chat_display.config(state=tk.DISABLED)
-        self.chat_display.see(tk.END)
-        
     def update_status(self, text):
         """Update status bar"""
         self.root.after(0, lambda: self.status_bar.config(text=text))
@@ -1,93 +1,164 @@
 import os
+import json
+import threading
+import hashlib
 import requests
 import re
+from collections import OrderedDict, deque
+from requests.adapters import HTTPAdapter
+
+# Patterns used by LLMProcessor.clean_response, compiled once at import
+_RE_ANSWER_BOLD = re.compile(r'^\*\*Answer:\*\*\s*', re.IGNORECASE)
+_RE_ANSWER = re.compile(r'^Answer:\s*', re.IGNORECASE)
+_RE_RESPONSE_BOLD = re.compile(r'^\*\*Response:\*\*\s*', re.IGNORECASE)
+_RE_TRAILING_ITALIC_NOTE = re.compile(r'\n?\*\([^)]+\)\*?\s*$')
+_RE_TRAILING_NOTE = re.compile(r'\n?\([^)]+\)\s*$')
+_RE_KEY_POINTS = re.compile(r'\n?\*?\(Key points:.*?\)\*?\s*$', re.DOTALL)
+
+# Question detection tables used by LLMProcessor.is_question
+_INCOMPLETE_ENDINGS = ('what is...', 'is...', 'about...', '...', 'so...', 'like...', 'the...')
+
+_QUESTION_PATTERNS = (
+    'tell me about yourself',
+    'describe yourself',
+    'what are your strengths',
+    'what are your weaknesses',
+    'why should we hire you',
+    'why do you want',
+    'where do you see yourself',
+    'describe a time',
+    'give me an example',
+    'how would you',
+    'what would you do',
+    'can you tell me about',
+    'could you explain',
+    'walk me through your',
+    'run me through your'
+)
+# All patterns in one alternation so a single scan covers them
+_RE_QUESTION_PATTERNS = re.compile('|'.join(re.escape(p) for p in _QUESTION_PATTERNS))
+
+_QUESTION_STARTERS = (
+    'what', 'why', 'how', 'when', 'where', 'who',
+    'can you', 'could you', 'would you', 'do you',
+    'tell me', 'explain', 'describe', 'define'
+)
+
+# Longest recent-context string put in a prompt; prompt length drives LLM latency
+_MAX_CONTEXT_CHARS = 400
+
+# Number of recent answers kept for repeated questions
+_ANSWER_CACHE_SIZE = 64
+
+
+class _StreamError(str):
+    """Error text yielded by a provider stream; marks the answer as failed so it isn't cached"""
+
+
+# Fixed parts of the prompt built by LLMProcessor._build_prompt
+_PROMPT_HEADER = "You are helping answer an interview question."
+
+_PROMPT_INSTRUCTIONS = """
+Provide a concise answer:
+- 2-3 main points
+- Use candidate's background if relevant
+- Natural tone
+- No labels or meta-commentary"""
 
 class LLMProcessor:
     def __init__(self):
         self.provider = os.getenv("LLM_PROVIDER", "ollama")
-        self.context_history = []  # Store recent transcriptions for context
+        self.ollama_base_url = os.getenv("OLLAMA_BASE_URL")
+        self.ollama_model = os.getenv("OLLAMA_MODEL")
+        self.ollama_keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # Keep the model loaded between questions
+        self.openrouter_api_key = os.getenv("OPENROUTER_API_KEY", "")
+        self.openrouter_model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
+        
+        # Reuse connections across questions (HTTP keep-alive)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
+        # Load the Ollama model now so the first question doesn't pay for it
+        if self.provider == "ollama":
+            threading.Thread(target=self._warm_up_ollama, daemon=True).start()
+        
         self.max_context = 5  # Keep last 5 transcriptions
+        self.context_history = deque(maxlen=self.max_context)  # Store recent transcriptions for context
         self.interview_context = None
         self.user_profile = None
+        self._answer_cache = OrderedDict()  # question digest -> cleaned answer (LRU order)
+        self._cache_lock = threading.Lock()  # process() may run on several threads
+        self._last_accumulated = None  # Context window last checked by check_accumulated_question
+        self._prompt_profile = ""  # Pre-rendered interview details, rebuilt by set_interview_context
     
     def set_interview_context(self, interview_context, user_profile):
         """Set interview context and user profile for personalized answers"""
         self.interview_context = interview_context
         self.user_profile = user_profile
+        self._prompt_profile = self._build_prompt_profile()
+        self._answer_cache.clear()  # Cached answers were personalized for the previous context
     
     def is_question(self, text: str) -> bool:
         """Detect if the text is likely a complete question"""
-        text_lower = text.strip().lower()
+        word_count = len(text.split())
         
         # Ignore very short texts (incomplete)
-        if len(text.split()) < 5:
+        if word_count < 5:
             return False
         
+        text_lower = text.strip().lower()
+        
         # Ignore if ends with incomplete markers
-        incomplete_endings = ['what is...', 'is...', 'about...', '...', 'so...', 'like...', 'the...']
-        for ending in incomplete_endings:
-            if text_lower.endswith(ending):
-                return False
+        if text_lower.endswith(_INCOMPLETE_ENDINGS):
+            return False
         
         # Check for question marks
         if '?' in text:
             return True
         
-        complete_question_patterns = [
-            'tell me about yourself',
-            'describe yourself',
-            'what are your strengths',
-            'what are your weaknesses',
-            'why should we hire you',
-            'why do you want',
-            'where do you see yourself',
-            'describe a time',
-            'give me an example',
-            'how would you',
-            'what would you do',
-            'can you tell me about',
-            'could you explain',
-            'walk me through your',
-            'run me through your'
-        ]
-        
-        for pattern in complete_question_patterns:
-            if pattern in text_lower:
-                return True
+        if _RE_QUESTION_PATTERNS.search(text_lower):
+            return True
         
-
-        if len(text.split()) >= 7:  # At least 7 words for complete question
-            question_starters = [
-                'what', 'why', 'how', 'when', 'where', 'who',
-                'can you', 'could you', 'would you', 'do you',
-                'tell me', 'explain', 'describe', 'define'
-            ]
-            
-            for starter in question_starters:
-                if text_lower.startswith(starter):
-                    return True
+        if word_count >= 7 and text_lower.startswith(_QUESTION_STARTERS):  # At least 7 words for complete question
+            return True
         
         return False
     
     def add_to_context(self, text: str):
         """Add transcription to context history"""
         self.context_history.append(text)
-        if len(self.context_history) > self.max_context:
-            self.context_history.pop(0)
     
     def get_context_string(self) -> str:
         """Get recent context as a string"""
         if not self.context_history:
             return ""
-        return " ".join(self.context_history[-3:])  # Last 3 items
+        context = " ".join(self._recent_context())
+        
+        # Keep the most recent text, starting at a word boundary
+        if len(context) > _MAX_CONTEXT_CHARS:
+            context = context[-_MAX_CONTEXT_CHARS:]
+            space = context.find(" ")
+            if space != -1:
+                context = context[space + 1:]
+        return context
+    
+    def _recent_context(self) -> list:
+        """Last 3 transcriptions, copied so appends from the STT loop can't interfere"""
+        return list(self.context_history)[-3:]
     
     def check_accumulated_question(self) -> str:
         """Check if recent context contains a complete question"""
         if len(self.context_history) < 2:
             return None
         
-        # Get last few items and combine
-        recent = " ".join(self.context_history[-3:])
+        # Get last few items and combine, unless this exact window was already checked
+        recent_items = tuple(self._recent_context())
+        if recent_items == self._last_accumulated:
+            return None
+        self._last_accumulated = recent_items
+        recent = " ".join(recent_items)
         
         # Check if this accumulated text is a question
         if self.is_question(recent):
@@ -98,95 +169,187 @@ class LLMProcessor:
     def clean_response(self, response: str) -> str:
         """Clean up LLM response by removing formatting artifacts"""
         # Remove common prefixes
-        response = re.sub(r'^\*\*Answer:\*\*\s*', '', response, flags=re.IGNORECASE)
-        response = re.sub(r'^Answer:\s*', '', response, flags=re.IGNORECASE)
-        response = re.sub(r'^\*\*Response:\*\*\s*', '', response, flags=re.IGNORECASE)
+        response = _RE_ANSWER_BOLD.sub('', response)
+        response = _RE_ANSWER.sub('', response)
+        response = _RE_RESPONSE_BOLD.sub('', response)
         
         # Remove meta-commentary in parentheses at the end
-        response = re.sub(r'\n?\*\([^)]+\)\*?\s*$', '', response)
-        response = re.sub(r'\n?\([^)]+\)\s*$', '', response)
+        response = _RE_TRAILING_ITALIC_NOTE.sub('', response)
+        response = _RE_TRAILING_NOTE.sub('', response)
         
         # Remove "Key points:" sections
-        response = re.sub(r'\n?\*?\(Key points:.*?\)\*?\s*$', '', response, flags=re.DOTALL)
+        response = _RE_KEY_POINTS.sub('', response)
         
         return response.strip()
     
-    def process(self, text: str, check_question: bool = True) -> str:
-        """Process interviewer's speech and return helpful response"""
-        response = None
+    def process(self, text: str, check_question: bool = True, on_chunk=None) -> str:
+        """Process interviewer's speech and return helpful response
+        
+        If on_chunk is given, it is called with each piece of the answer as the
+        LLM streams it. The cleaned full answer is returned once generation ends.
+        Repeated questions are answered from cache without calling the LLM.
+        """
+        key = self._cache_key(text)
+        with self._cache_lock:
+            cached = self._answer_cache.get(key)
+            if cached is not None:
+                self._answer_cache.move_to_end(key)
+                return cached
+        
+        chunks = []
+        failed = False
+        for chunk in self.process_stream(text):
+            failed = failed or isinstance(chunk, _StreamError)
+            chunks.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+        
+        # Clean up the response
+        response = self.clean_response("".join(chunks))
+        
+        # Only cache answers whose stream completed cleanly
+        if not failed:
+            with self._cache_lock:
+                self._answer_cache[key] = response
+                if len(self._answer_cache) > _ANSWER_CACHE_SIZE:
+                    self._answer_cache.popitem(last=False)
+        return response
+    
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        """Digest of the question with case and word order normalized"""
+        normalized = " ".join(sorted(text.lower().split()))
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+    
+    def process_stream(self, text: str):
+        """Return a generator yielding the raw answer as the LLM generates it"""
         if self.provider == "ollama":
-            response = self._process_ollama(text)
+            return self._process_ollama(text)
         elif self.provider == "openrouter":
-            response = self._process_openrouter(text)
+            return self._process_openrouter(text)
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
-        
-        # Clean up the response
-        return self.clean_response(response)
     
-    def _process_ollama(self, text: str) -> str:
-        """Process using local Ollama"""
+    def _process_ollama(self, text: str):
+        """Stream response tokens from local Ollama"""
         prompt = self._build_prompt(text)
-        base_url = os.getenv("OLLAMA_BASE_URL")
-        model = os.getenv("OLLAMA_MODEL")
         
         try:
-            response = requests.post(
-                f"{base_url}/api/generate",  # Correct Ollama endpoint
+            with self._session.post(
+                f"{self.ollama_base_url}/api/generate",  # Correct Ollama endpoint
                 json={
-                    "model": model,
+                    "model": self.ollama_model,
                     "prompt": prompt,
-                    "stream": False
+                    "stream": True,
+                    "keep_alive": self.ollama_keep_alive
                 },
-                timeout=60
-            )
-            response.raise_for_status()
-            return response.json()["response"]
+                timeout=60,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                # One JSON object per line
+                done = False
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        done = True
+                        break
+                if not done:
+                    raise ConnectionError("response ended before generation finished")
         except Exception as e:
-            return f"Error with Ollama: {str(e)}\nMake sure Ollama is running: ollama serve"
+            yield _StreamError(f"Error with Ollama: {str(e)}\nMake sure Ollama is running: ollama serve")
+    
+    def _warm_up_ollama(self):
+        """Ask Ollama to load the model (an empty prompt only loads it)"""
+        try:
+            self._session.post(
+                f"{self.ollama_base_url}/api/generate",
+                json={
+                    "model": self.ollama_model,
+                    "prompt": "",
+                    "keep_alive": self.ollama_keep_alive
+                },
+                timeout=120
+            )
+        except Exception:
+            pass  # Ollama may not be running yet; the first question will report it
     
-    def _process_openrouter(self, text: str) -> str:
-        """Process using OpenRouter API"""
-        api_key = os.getenv("OPENROUTER_API_KEY", "")
-        if not api_key:
-            return "Error: OPENROUTER_API_KEY not set"
+    def _process_openrouter(self, text: str):
+        """Stream response tokens from OpenRouter API"""
+        if not self.openrouter_api_key:
+            yield _StreamError("Error: OPENROUTER_API_KEY not set")
+            return
         
-        model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
         prompt = self._build_prompt(text)
         
         try:
-            response = requests.post(
+            with self._session.post(
                 "https://openrouter.ai/api/v1/chat/completions",
                 headers={
-                    "Authorization": f"Bearer {api_key}",
+                    "Authorization": f"Bearer {self.openrouter_api_key}",
                     "Content-Type": "application/json"
                 },
                 json={
-                    "model": model,
+                    "model": self.openrouter_model,
                     "messages": [
                         {"role": "system", "content": "You are a helpful interview assistant. Provide concise, accurate answers to interview questions."},
                         {"role": "user", "content": prompt}
-                    ]
+                    ],
+                    "stream": True
                 },
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+                timeout=30,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                # Server-sent events; lines starting with ':' are keep-alive comments
+                done = False
+                for line in response.iter_lines():
+                    line = line.decode("utf-8")
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        done = True
+                        break
+                    event = json.loads(data)
+                    if "error" in event:
+                        raise RuntimeError(event["error"])
+                    delta = event["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        yield delta["content"]
+                if not done:
+                    raise ConnectionError("response ended before generation finished")
         except Exception as e:
-            return f"Error with OpenRouter: {str(e)}"
+            yield _StreamError(f"Error with OpenRouter: {str(e)}")
     
     def _build_prompt(self, interviewer_text: str) -> str:
         """Build prompt for LLM with context"""
-        context = self.get_context_string()
+        # The question itself is already in the prompt
+        context = self.get_context_string().replace(interviewer_text, "").strip()
         
-        prompt = f"""You are helping answer an interview question.
-
-Question: "{interviewer_text}"
-"""
+        # Add recent context
+        context_block = ""
+        if context:
+            context_block = f"\nRecent Context: {context}\n"
+        
+        return (
+            f"{_PROMPT_HEADER}\n\nQuestion: \"{interviewer_text}\"\n"
+            f"{self._prompt_profile}{context_block}{_PROMPT_INSTRUCTIONS}"
+        )
+    
+    def _build_prompt_profile(self) -> str:
+        """Render the per-interview part of the prompt (details and background)"""
+        profile = ""
         
         # Add interview context
         if self.interview_context:
-            prompt += f"""
+            profile += f"""
 Interview Details:
 - Company: {self.interview_context.get('company', 'N/A')}
 - Position: {self.interview_context.get('position', 'N/A')}
@@ -195,22 +358,10 @@ Interview Details:
         # Add user self intro
         if self.user_profile:
             if 'self_intro' in self.user_profile:
-                prompt += f"\nCandidate Background:\n{self.user_profile['self_intro'][:500]}\n"
+                profile += f"\nCandidate Background:\n{self.user_profile['self_intro'][:500]}\n"
             
             # Add company background if available
             if 'company_background' in self.user_profile:
-                prompt += f"\nCompany Research:\n{self.user_profile['company_background'][:500]}\n"
-        
-        # Add recent context
-        if context and context != interviewer_text:
-            prompt += f"\nRecent Context: {context}\n"
+                profile += f"\nCompany Research:\n{self.user_profile['company_background'][:500]}\n"
         
-        prompt += """
-Provide a concise answer:
-- 2-3 main points
-- Use candidate's background if relevant
-- Natural tone
-- No labels or meta-commentary"""
-        
-        return prompt
-
+        return profile
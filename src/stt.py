@@ -9,76 +9,134 @@ License: GPL-3.0
 
 import threading
 import queue
-import io
 import logging
-import wave
-import struct
+import re
 import os
 import sys
+from collections import deque
 
 # Fix OpenMP duplicate library issue
 os.environ['KMP_DUPLICATE_LIB_OK'] = 'TRUE'
 
-# Add cuDNN and cuBLAS to PATH before importing CUDA libraries
-try:
-    import nvidia.cudnn
-    cudnn_path = os.path.dirname(nvidia.cudnn.__file__)
-    
-    paths_to_add = []
-    if os.path.exists(cudnn_path):
-        paths_to_add.append(cudnn_path)
-        os.add_dll_directory(cudnn_path)
-    
-    try:
-        import nvidia.cublas.lib
-        cublas_path = os.path.dirname(nvidia.cublas.lib.__file__)
-        if os.path.exists(cublas_path):
-            paths_to_add.append(cublas_path)
-            os.add_dll_directory(cublas_path)
-    except:
-        pass
-    
-    if paths_to_add:
-        os.environ['PATH'] = os.pathsep.join(paths_to_add) + os.pathsep + os.environ.get('PATH', '')
-except Exception as e:
-    pass  # Silently ignore, will try CPU fallback
+# CTranslate2 speedups, read when it loads: reduced-precision FP16 GEMM reductions on
+# tensor cores, and packed GEMM weights for Intel MKL on CPU
+os.environ.setdefault('CT2_CUDA_ALLOW_FP16_REDUCED_PRECISION_REDUCTION', '1')
+os.environ.setdefault('CT2_USE_EXPERIMENTAL_PACKED_GEMM', '1')
 
+import numpy as np
 import pyaudio
-import speech_recognition as sr
 
-import time
+import ctranslate2
 from faster_whisper import WhisperModel
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+# Whisper models take float32 mono audio at this rate
+WHISPER_SAMPLE_RATE = 16000
+
+# Whisper's encoder always processes (zero-padded) windows of this many seconds
+WHISPER_WINDOW_SECONDS = 30
+
+# Transcribed segments kept for the session log written by STT.stop
+TRANSCRIPTION_HISTORY = 1024
+
+# Length of the anti-aliasing filter used when downsampling to WHISPER_SAMPLE_RATE
+RESAMPLE_TAPS = 63
+
+# Names that identify system audio loopback devices (matched case-insensitively)
+LOOPBACK_KEYWORDS = ['stereo mix', 'wave out mix', 'loopback', 'what u hear', 'what you hear',
+                     'rec. playback', 'recording playback']
+_RE_LOOPBACK = re.compile('|'.join(re.escape(keyword) for keyword in LOOPBACK_KEYWORDS))
+
+# Compute types tried by STT.select_compute_type, fastest first.
+# INT8 kernels halve weight memory; float16/float32 are the fallbacks when they are unavailable.
+COMPUTE_TYPE_PREFERENCE = {
+    "cuda": ("int8_float16", "int8_bfloat16", "float16", "bfloat16", "float32"),
+    "cpu": ("int8", "int8_float32", "float32"),
+}
+
+_cuda_libs_ready = False
+
+
+def _ensure_cuda_libs():
+    """Add the pip-installed cuDNN and cuBLAS to the DLL search path (once, on first CUDA use)."""
+    global _cuda_libs_ready
+    if _cuda_libs_ready:
+        return
+    _cuda_libs_ready = True
+
+    try:
+        import nvidia.cudnn
+        cudnn_path = os.path.dirname(nvidia.cudnn.__file__)
+        
+        paths_to_add = []
+        if os.path.exists(cudnn_path):
+            paths_to_add.append(cudnn_path)
+            os.add_dll_directory(cudnn_path)
+        
+        try:
+            import nvidia.cublas.lib
+            cublas_path = os.path.dirname(nvidia.cublas.lib.__file__)
+            if os.path.exists(cublas_path):
+                paths_to_add.append(cublas_path)
+                os.add_dll_directory(cublas_path)
+        except:
+            pass
+        
+        if paths_to_add:
+            os.environ['PATH'] = os.pathsep.join(paths_to_add) + os.pathsep + os.environ.get('PATH', '')
+    except Exception as e:
+        pass  # Silently ignore, will try CPU fallback
 
 
 class STT:
-    """Real-time Speech to Text class using Faster WhisperModel and speech_recognition."""
+    """Real-time Speech to Text class using Faster WhisperModel and PyAudio."""
 
-    def __init__(self, model_size: str = "medium.en", device: str = "cuda", compute_type: str = "float16",
-                 language: str = "en", logging_level: str = None):
+    def __init__(self, model_size: str = "distil-medium.en", device: str = "cuda", compute_type: str = "auto",
+                 language: str = "en", logging_level: str = None, cpu_threads: int = 0, num_workers: int = 1,
+                 download_root: str = None, beam_size: int = 1, temperature=(0.0, 0.2, 0.4)):
         """Initialize the STT object."""
-        self.recorder = sr.Recognizer()
         self.data_queue = queue.Queue()
-        self.transcription = ['']
-        self.last_transcription = ""
+        self.transcription = deque(maxlen=TRANSCRIPTION_HISTORY)
+        self.last_transcription = deque(maxlen=1)  # Newest segment; deque ops are atomic, so no lock is needed
+        self.transcription_queue = queue.Queue()
         self.is_listening = True
 
+        if device == "cuda":
+            _ensure_cuda_libs()
+
         self.model_size = model_size
         self.device = device
-        self.compute_type = compute_type
+        self.compute_type = self.select_compute_type(device) if compute_type == "auto" else compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.download_root = download_root
         self.language = language
-        self.default_mic = self.setup_mic()
+        self.beam_size = beam_size  # 1 = greedy decoding; short chunks lose little accuracy
+        self.temperature = temperature  # Fallback temperatures when decoding fails
+        self.vad_options = VadOptions()  # Silero VAD settings for the speech gate in transcribe_audio
+        # One PortAudio instance for device lookup and capture
+        self.p = pyaudio.PyAudio()
+        self.device_info = {}  # device index -> PortAudio device info, filled by setup_mic
+        self.default_mic = self.setup_mic(self.p, self.device_info)
         
         # PyAudio parameters
         self.CHUNK = 1024
         self.FORMAT = pyaudio.paInt16
         self.CHANNELS = 2
         self.RATE = 16000
-        self.audio_buffer = []
+        self.buffers = None  # Two chunk-sized capture buffers, preallocated by listen() once the sample format is known
+        self.active = 0  # Buffer the audio callback is filling
+        self.buf_pos = 0  # Bytes written to the active buffer
+        self.buffers_filled = 0  # Full buffers handed over (audio callback only)
+        self.buffers_taken = 0  # Full buffers processed (capture thread only)
+        self.chunk_ready = threading.Event()
         self.buffer_duration = 5  # seconds of audio to buffer before transcribing (increased for complete questions)
 
-        self.model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type)
-
-        self.lock = threading.Lock()
+        self.model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type,
+                                  cpu_threads=self.cpu_threads, num_workers=self.num_workers,
+                                  download_root=self.download_root)
+        self.log_compute_type()
+        self.warm_up()
 
         if logging_level:
             self.configure_logging(level=logging_level)
@@ -95,57 +153,152 @@ class STT:
         while self.is_listening:
             audio_data = self.data_queue.get()
 
-            if audio_data == 'STOP':
+            if isinstance(audio_data, str):  # 'STOP' from stop()
                 break
 
-            segments, info = self.model.transcribe(audio_data, beam_size=5, language=self.language, vad_filter=True)
-            for segment in segments:
-                text = segment.text.strip()
-                logging.info("[%.2fs -> %.2fs] %s" % (segment.start, segment.end, text))
-                with self.lock:
-                    self.transcription.append(text)
-                    self.last_transcription = text
+            # Catch up on a backlog in one call. Queued chunks are consecutive audio, and the
+            # encoder pads every window to 30 s, so up to 30 s costs the same as one chunk.
+            batch = [audio_data]
+            stopping = False
+            while len(batch) < WHISPER_WINDOW_SECONDS // self.buffer_duration:
+                try:
+                    queued = self.data_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(queued, str):
+                    stopping = True
+                    break
+                batch.append(queued)
+            if len(batch) > 1:
+                audio_data = np.concatenate(batch)
+
+            self.transcribe_audio(audio_data)
+
+            for _ in batch:
+                self.data_queue.task_done()
+            if stopping:
+                break
 
-            self.data_queue.task_done()
-            time.sleep(0.25)
+    def transcribe_audio(self, audio_data: np.ndarray):
+        """Transcribe 16 kHz mono audio, skipping Whisper entirely when it contains no speech."""
+        speech = get_speech_timestamps(audio_data, self.vad_options)
+        if not speech:
+            return
+
+        # Only the span from the first to the last speech segment goes through the encoder
+        audio_data = audio_data[speech[0]['start']:speech[-1]['end']]
+
+        segments, info = self.model.transcribe(audio_data, beam_size=self.beam_size, language=self.language,
+                                               vad_filter=False, condition_on_previous_text=False,
+                                               without_timestamps=True, word_timestamps=False,
+                                               no_speech_threshold=0.6, temperature=self.temperature)
+        for segment in segments:
+            text = segment.text.strip()
+            logging.info("Segment: %s" % text)
+            # Single writer (this thread); readers only pop, so no lock is needed
+            self.transcription.append(text)
+            self.last_transcription.append(text)
+            if text:
+                self.transcription_queue.put(text)
 
     def audio_callback(self, in_data, frame_count, time_info, status):
         """PyAudio callback function for capturing audio."""
         if status:
             logging.warning(f"Audio callback status: {status}")
         
-        self.audio_buffer.append(in_data)
-        
-        # Check if we have enough audio buffered
-        buffer_size = len(self.audio_buffer) * self.CHUNK / self.RATE
-        if buffer_size >= self.buffer_duration:
-            try:
-                # Convert buffer to WAV format
-                audio_data = b''.join(self.audio_buffer)
-                wav_buffer = io.BytesIO()
-                
-                with wave.open(wav_buffer, 'wb') as wf:
-                    wf.setnchannels(self.CHANNELS)
-                    wf.setsampwidth(self.sample_width)
-                    wf.setframerate(self.RATE)
-                    wf.writeframes(audio_data)
-                
-                wav_buffer.seek(0)
-                self.data_queue.put(wav_buffer)
-                self.audio_buffer = []
-            except Exception as e:
-                logging.error(f"Error in audio callback: {e}")
-                self.audio_buffer = []
+        # Realtime thread: only copy into the active buffer; process_captured_audio does the rest
+        data = memoryview(in_data)
+        while data:
+            buf = self.buffer_bytes[self.active]
+            n = min(len(data), self.chunk_bytes - self.buf_pos)
+            buf[self.buf_pos:self.buf_pos + n] = data[:n]
+            data = data[n:]
+            self.buf_pos += n
+            
+            if self.buf_pos == self.chunk_bytes:
+                # Hand the full buffer to the capture thread and keep recording into the other one
+                self.active ^= 1
+                self.buf_pos = 0
+                self.buffers_filled += 1
+                self.chunk_ready.set()
         
         return (in_data, pyaudio.paContinue)
 
+    def process_captured_audio(self):
+        """Convert each full capture buffer in place while the callback fills the other one."""
+        while self.is_listening:
+            self.chunk_ready.wait(timeout=0.5)
+            self.chunk_ready.clear()
+
+            while self.buffers_taken < self.buffers_filled:
+                if self.buffers_filled - self.buffers_taken > 1:
+                    # The callback has already started overwriting the older buffer; keep the newest
+                    logging.warning("Audio capture overrun, dropping audio")
+                    self.buffers_taken = self.buffers_filled - 1
+
+                # Buffers alternate, so the n-th full buffer is buffers[n % 2]
+                pcm = self.buffers[self.buffers_taken & 1]
+
+                try:
+                    self.data_queue.put(self.to_whisper_audio(pcm))
+                except Exception as e:
+                    logging.error(f"Error processing captured audio: {e}")
+                self.buffers_taken += 1
+
+    def to_whisper_audio(self, pcm) -> np.ndarray:
+        """Convert raw int16 PCM from the device to float32 mono at 16 kHz for faster-whisper."""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        resampling = self.RATE != WHISPER_SAMPLE_RATE
+
+        # Chunks at 16 kHz go straight onto data_queue, so they need their own array;
+        # otherwise the preallocated one is only an input to the resampler
+        audio = self.pre_audio if resampling else np.empty(len(self.pre_audio), dtype=np.float32)
+
+        if self.CHANNELS == 2:
+            # Downmix, cast and normalise in two passes: integer channel sum, then scale by 1 / (2 * 32768)
+            np.sum(samples.reshape(-1, 2), axis=1, dtype=np.int32, out=self.pre_sum)
+            np.multiply(self.pre_sum, 1.0 / 65536.0, out=audio, dtype=np.float32)
+        else:
+            np.multiply(samples, 1.0 / 32768.0, out=audio, dtype=np.float32)
+
+        if resampling:
+            audio = self.resample(audio)
+
+        return audio
+
+    def prepare_resampler(self):
+        """Precompute the filter and 16 kHz sample positions for buffer_duration-long chunks."""
+        in_frames = self.buffer_duration * self.RATE
+        out_frames = self.buffer_duration * WHISPER_SAMPLE_RATE
+
+        # Windowed-sinc low-pass just under the 8 kHz output Nyquist (only needed when downsampling)
+        self.resample_taps = None
+        if self.RATE > WHISPER_SAMPLE_RATE:
+            cutoff = 0.9 * WHISPER_SAMPLE_RATE / (2 * self.RATE)  # cycles per input sample
+            n = np.arange(RESAMPLE_TAPS) - (RESAMPLE_TAPS - 1) / 2
+            taps = np.sinc(2 * cutoff * n) * np.hamming(RESAMPLE_TAPS)
+            self.resample_taps = (taps / taps.sum()).astype(np.float32)
+
+        # Each output sample interpolates between two input samples
+        positions = np.arange(out_frames) * (self.RATE / WHISPER_SAMPLE_RATE)
+        self.resample_index = np.minimum(positions.astype(np.int64), in_frames - 2)
+        self.resample_weight = (positions - self.resample_index).astype(np.float32)
+        self.resample_exact = not self.resample_weight.any()  # e.g. 48 kHz -> 16 kHz is plain decimation
+
+    def resample(self, audio: np.ndarray) -> np.ndarray:
+        """Resample a mono chunk from the device rate to 16 kHz."""
+        if self.resample_taps is not None:
+            audio = np.convolve(audio, self.resample_taps, mode='same')
+
+        if self.resample_exact:
+            return audio[self.resample_index]
+        return audio[self.resample_index] * (1 - self.resample_weight) + audio[self.resample_index + 1] * self.resample_weight
+
     def listen(self):
         """Start listening to the audio source using PyAudio directly."""
         try:
-            self.p = pyaudio.PyAudio()
-            
             # Get device info
-            device_info = self.p.get_device_info_by_index(self.default_mic)
+            device_info = self.device_info[self.default_mic]
             
             # Use device's default sample rate
             self.RATE = int(device_info['defaultSampleRate'])
@@ -160,6 +313,22 @@ class STT:
             # Get sample width
             self.sample_width = self.p.get_sample_size(self.FORMAT)
             
+            # Double-buffered raw PCM: the audio callback fills one chunk while the capture thread converts the other
+            self.chunk_bytes = self.buffer_duration * self.RATE * self.CHANNELS * self.sample_width
+            self.buffers = [np.zeros(self.chunk_bytes // self.sample_width, dtype=np.int16) for _ in range(2)]
+            self.buffer_bytes = [memoryview(buf).cast('B') for buf in self.buffers]
+            self.active = 0
+            self.buf_pos = 0
+            self.buffers_filled = 0
+            self.buffers_taken = 0
+            # Scratch arrays for to_whisper_audio (capture thread only)
+            self.pre_sum = np.empty(self.buffer_duration * self.RATE, dtype=np.int32)
+            self.pre_audio = np.empty(self.buffer_duration * self.RATE, dtype=np.float32)
+            self.prepare_resampler()
+            
+            self.capture_thread = threading.Thread(target=self.process_captured_audio, daemon=True)
+            self.capture_thread.start()
+            
             logging.info(f"Audio settings: {self.RATE}Hz, {self.CHANNELS} channel(s)")
             logging.info("Starting background audio capture from system audio...")
             print(f"Listening to system audio on: {device_info['name']}")
@@ -181,14 +350,13 @@ class STT:
             
         except Exception as e:
             logging.error(f"Error starting audio capture: {e}")
-            if hasattr(self, 'p'):
-                self.p.terminate()
+            self.p.terminate()
             raise e
 
     def stop(self):
         """Stop the transcription process."""
         logging.info("Stopping...")
-        logging.info(f"Transcription:\n {self.transcription}")
+        logging.info(f"Transcription:\n {list(self.transcription)}")
         self.is_listening = False
         
         # Stop PyAudio stream
@@ -203,64 +371,102 @@ class STT:
 
     def get_last_transcription(self):
         """Get the last transcription and clear it."""
-        with self.lock:
-            text = self.last_transcription
-            self.last_transcription = ""
-        return text
+        try:
+            return self.last_transcription.pop()
+        except IndexError:
+            return ""
+
+    def warm_up(self):
+        """Run one silent transcription so device setup doesn't stall the first real chunk.
+
+        Uses a production-sized chunk and the same decode options as transcribe_audio, so
+        allocator and kernel setup for those shapes happens here rather than on live audio.
+        """
+        silence = np.zeros(self.buffer_duration * WHISPER_SAMPLE_RATE, dtype=np.float32)
+        segments, _ = self.model.transcribe(silence, beam_size=self.beam_size, language=self.language,
+                                            vad_filter=False, condition_on_previous_text=False,
+                                            without_timestamps=True, word_timestamps=False,
+                                            temperature=self.temperature)
+        for _ in segments:  # Decoding is lazy; drain it
+            pass
+
+    @staticmethod
+    def select_compute_type(device: str) -> str:
+        """Pick the fastest compute type the device supports."""
+        try:
+            supported = ctranslate2.get_supported_compute_types(device)
+        except Exception as e:
+            logging.warning(f"Could not query compute types for {device}: {e}")
+            return "auto"  # Let CTranslate2 decide
+
+        for compute_type in COMPUTE_TYPE_PREFERENCE.get(device, ()):
+            if compute_type in supported:
+                return compute_type
+        return "auto"
+
+    def log_compute_type(self):
+        """Report the requested compute type next to what the device supports."""
+        try:
+            supported = ", ".join(sorted(ctranslate2.get_supported_compute_types(self.device)))
+        except Exception as e:
+            supported = f"unknown ({e})"
+        logging.info(f"Compute type: {self.compute_type}, supported on {self.device}: {supported}")
+        print(f"Whisper compute type: {self.compute_type} (supported on {self.device}: {supported})")
+
+    def get_transcription(self, timeout: float = 1.0):
+        """Block until the next transcription is available.
+
+        Raises queue.Empty if nothing was transcribed within `timeout` seconds.
+        """
+        return self.transcription_queue.get(timeout=timeout)
 
     @staticmethod
-    def setup_mic():
-        """Set up the audio capture device (looks for system audio loopback/Stereo Mix)."""
-        p = pyaudio.PyAudio()
+    def setup_mic(p, device_info: dict):
+        """Set up the audio capture device (looks for system audio loopback/Stereo Mix).
+
+        :param p: The PyAudio instance to query.
+        :param device_info: Filled with the info of every device queried, keyed by index.
+        """
         device_index = None
-        
-        # Keywords to identify system audio loopback devices
-        loopback_keywords = ['stereo mix', 'wave out mix', 'loopback', 'what u hear', 'what you hear', 
-                            'rec. playback', 'recording playback']
+        first_input = None  # Fallback if no loopback device is found
         
         logging.info("Searching for system audio capture device...")
         print("\nAvailable audio input devices:")
         
-        # List all input devices and try to find a loopback device
+        # List input devices once, stopping at the first loopback device
         for i in range(p.get_device_count()):
-            info = p.get_device_info_by_index(i)
+            info = device_info[i] = p.get_device_info_by_index(i)
             if info['maxInputChannels'] > 0:
-                device_name = info['name'].lower()
                 print(f"  [{i}] {info['name']}")
                 logging.info(f"Device index: {i}, Device name: {info['name']}")
                 
-                # Check if this is a loopback/stereo mix device
-                for keyword in loopback_keywords:
-                    if keyword in device_name:
-                        device_index = i
-                        print(f"\n✓ Found system audio device: {info['name']}")
-                        logging.info(f"Selected system audio device: {info['name']} (index: {i})")
-                        break
+                if first_input is None:
+                    first_input = i
                 
-                if device_index is not None:
+                # Check if this is a loopback/stereo mix device
+                if _RE_LOOPBACK.search(info['name'].lower()):
+                    device_index = i
+                    print(f"\n✓ Found system audio device: {info['name']}")
+                    logging.info(f"Selected system audio device: {info['name']} (index: {i})")
                     break
         
         # If no loopback device found, use the first available input device
-        if device_index is None:
-            for i in range(p.get_device_count()):
-                info = p.get_device_info_by_index(i)
-                if info['maxInputChannels'] > 0:
-                    device_index = i
-                    print(f"\n⚠ No system audio loopback device found. Using: {info['name']}")
-                    print("\nTo capture system audio on Windows:")
-                    print("1. Right-click the sound icon in system tray")
-                    print("2. Select 'Sounds' or 'Sound settings'")
-                    print("3. Go to 'Recording' tab")
-                    print("4. Right-click in empty space and enable 'Show Disabled Devices'")
-                    print("5. Find 'Stereo Mix' and enable it")
-                    print("6. Set it as default recording device\n")
-                    logging.warning(f"Using fallback device: {info['name']} (index: {i})")
-                    break
+        if device_index is None and first_input is not None:
+            device_index = i = first_input
+            info = device_info[i]
+            print(f"\n⚠ No system audio loopback device found. Using: {info['name']}")
+            print("\nTo capture system audio on Windows:")
+            print("1. Right-click the sound icon in system tray")
+            print("2. Select 'Sounds' or 'Sound settings'")
+            print("3. Go to 'Recording' tab")
+            print("4. Right-click in empty space and enable 'Show Disabled Devices'")
+            print("5. Find 'Stereo Mix' and enable it")
+            print("6. Set it as default recording device\n")
+            logging.warning(f"Using fallback device: {info['name']} (index: {i})")
         
         if device_index is None:
             raise Exception("No audio input devices found.")
         
-        p.terminate()
         return device_index
 
     @staticmethod